@@ -6,11 +6,11 @@ import json
 import os
 from typing import List, Dict, Any
 from datetime import datetime
-import uuid
 
 from services.cosmos_service import CosmosService
 from services.azure_search_service import AzureSearchService
 from services.ragas_service import RagasService
+from services.context_store_service import ContextStoreService
 from models.schemas import (
     EvaluationRequest, 
     LLMConfig, 
@@ -37,6 +37,7 @@ app.mount("/static", StaticFiles(directory="frontend"), name="static")
 cosmos_service = CosmosService()
 search_service = AzureSearchService()
 ragas_service = RagasService()
+context_store = ContextStoreService(cosmos_service)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -128,17 +129,12 @@ async def run_ragas_evaluation(request: EvaluationRequest):
         # Run the evaluation
         result = await ragas_service.run_evaluation(request)
         
-        # Store results in Cosmos DB
-        evaluation_result = {
-            "id": str(uuid.uuid4()),
-            "type": "evaluation-result",
-            "name": request.name,
-            "config": request.dict(),
-            "result": result,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-        
-        await cosmos_service.save_evaluation_result(evaluation_result)
+        # Store results in Cosmos DB, with contexts moved to the chunk store
+        evaluation_result = await cosmos_service.create_evaluation_result(
+            request.name,
+            request.dict(),
+            await context_store.dehydrate_result(result)
+        )
         
         return {
             "status": "success",
@@ -154,14 +150,43 @@ async def get_evaluations():
     """Get all evaluation results"""
     return await cosmos_service.get_evaluation_results()
 
+@app.get("/dashboard-summary")
+async def get_dashboard_summary():
+    """Get precomputed dashboard aggregates"""
+    return await cosmos_service.get_dashboard_aggregates()
+
+@app.post("/dashboard-summary/rebuild")
+async def rebuild_dashboard_summary():
+    """Recompute dashboard aggregates from all stored evaluations"""
+    try:
+        return await cosmos_service.rebuild_dashboard_aggregates()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/evaluations/{evaluation_id}")
-async def get_evaluation(evaluation_id: str):
+async def get_evaluation(evaluation_id: str, include_contexts: bool = False):
     """Get specific evaluation result"""
     result = await cosmos_service.get_evaluation_result(evaluation_id)
     if not result:
         raise HTTPException(status_code=404, detail="Evaluation not found")
+    if include_contexts and result.get("result"):
+        try:
+            await context_store.hydrate_result(result["result"])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
     return result
 
+@app.get("/contexts/{chunk_hash}")
+async def get_context(chunk_hash: str):
+    """Get a retrieved context chunk by its content hash"""
+    try:
+        content = await context_store.get_context(chunk_hash)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if content is None:
+        raise HTTPException(status_code=404, detail="Context not found")
+    return {"id": chunk_hash, "content": content}
+
 @app.post("/llm-configs")
 async def create_llm_config(config: LLMConfig):
     """Create new LLM configuration"""
@@ -0,0 +1,128 @@
+import os
+import copy
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from services.cosmos_service import CosmosService
+
+class ContextStoreService:
+    """Content-addressed store for retrieved context chunks.
+
+    Evaluation results reference chunks by SHA-256 hash (``context_hashes``)
+    instead of embedding the full text, so a chunk retrieved by many test
+    cases or many runs against the same index is stored exactly once.
+    """
+
+    def __init__(self, cosmos_service: CosmosService):
+        self.cosmos_service = cosmos_service
+        self.cache_size = max(0, int(os.getenv("CONTEXT_CACHE_SIZE", "2048")))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        """Compute the content hash used as a chunk ID"""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, chunk_hash: str) -> Optional[str]:
+        content = self._cache.get(chunk_hash)
+        if content is not None:
+            self._cache.move_to_end(chunk_hash)
+        return content
+
+    def _cache_put(self, chunk_hash: str, content: str):
+        self._cache[chunk_hash] = content
+        self._cache.move_to_end(chunk_hash)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def store_contexts(self, contexts: List[str]) -> List[str]:
+        """Store context chunks that are not yet known and return their hashes"""
+        hashes = [self.hash_content(content) for content in contexts]
+
+        # Only check Cosmos for chunks we haven't seen in this process
+        pending = {}
+        for chunk_hash, content in zip(hashes, contexts):
+            if chunk_hash not in pending and self._cache_get(chunk_hash) is None:
+                pending[chunk_hash] = content
+
+        if pending:
+            existing = set(await self.cosmos_service.get_existing_context_hashes(list(pending)))
+            for chunk_hash, content in pending.items():
+                if chunk_hash not in existing:
+                    await self.cosmos_service.save_context_chunk({
+                        "id": chunk_hash,
+                        "content": content,
+                        "created_at": datetime.utcnow().isoformat()
+                    })
+                self._cache_put(chunk_hash, content)
+
+        return hashes
+
+    async def get_contexts(self, chunk_hashes: List[str]) -> Dict[str, str]:
+        """Get chunk contents by hash, fetching cache misses in batched queries"""
+        found = {}
+        missing = []
+        for chunk_hash in dict.fromkeys(chunk_hashes):
+            content = self._cache_get(chunk_hash)
+            if content is None:
+                missing.append(chunk_hash)
+            else:
+                found[chunk_hash] = content
+
+        if missing:
+            for chunk in await self.cosmos_service.get_context_chunks(missing):
+                found[chunk["id"]] = chunk["content"]
+                self._cache_put(chunk["id"], chunk["content"])
+
+        return found
+
+    async def get_context(self, chunk_hash: str) -> Optional[str]:
+        """Get a single chunk content by hash"""
+        return (await self.get_contexts([chunk_hash])).get(chunk_hash)
+
+    async def dehydrate_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of an evaluation result with contexts replaced by hashes"""
+        stored = copy.deepcopy(result)
+
+        all_contexts = []
+        for case_result in stored.get("test_case_results", []):
+            all_contexts.extend(case_result.get("contexts", []))
+        await self.store_contexts(all_contexts)
+
+        for case_result in stored.get("test_case_results", []):
+            if "contexts" in case_result:
+                case_result["context_hashes"] = [
+                    self.hash_content(content) for content in case_result.pop("contexts")
+                ]
+
+        return stored
+
+    async def hydrate_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve context hashes in an evaluation result back to chunk contents.
+
+        Hashes that cannot be resolved are left out of ``contexts`` and listed
+        in ``missing_context_hashes`` rather than replaced with empty text.
+        """
+        case_results = result.get("test_case_results", [])
+
+        all_hashes = []
+        for case_result in case_results:
+            all_hashes.extend(case_result.get("context_hashes", []))
+        contents = await self.get_contexts(all_hashes)
+
+        for case_result in case_results:
+            if "context_hashes" in case_result:
+                case_result["contexts"] = [
+                    contents[chunk_hash] for chunk_hash in case_result["context_hashes"]
+                    if chunk_hash in contents
+                ]
+                missing = [
+                    chunk_hash for chunk_hash in case_result["context_hashes"]
+                    if chunk_hash not in contents
+                ]
+                if missing:
+                    case_result["missing_context_hashes"] = missing
+
+        return result
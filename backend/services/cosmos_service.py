@@ -1,9 +1,17 @@
 import os
+import math
+import uuid
+from datetime import datetime
 from azure.cosmos import CosmosClient, PartitionKey
 from azure.cosmos.exceptions import CosmosHttpResponseError
+from azure.core import MatchConditions
 from typing import List, Dict, Any, Optional
 import json
 
+CONTEXT_QUERY_BATCH_SIZE = 250
+DASHBOARD_AGGREGATES_ID = "dashboard-aggregates"
+DASHBOARD_METRICS = ["faithfulness", "answer_relevancy", "context_recall", "context_precision"]
+
 class CosmosService:
     def __init__(self):
         # These should be set as environment variables
@@ -11,6 +19,7 @@ class CosmosService:
         self.key = os.getenv("COSMOS_KEY")
         self.database_name = os.getenv("COSMOS_DATABASE_NAME", "ragas_db")
         self.container_name = os.getenv("COSMOS_CONTAINER_NAME", "configurations")
+        self.dashboard_window = max(1, int(os.getenv("DASHBOARD_ROLLING_WINDOW", "20")))
         
         if not self.endpoint or not self.key:
             raise ValueError("COSMOS_ENDPOINT and COSMOS_KEY environment variables must be set")
@@ -91,10 +100,29 @@ class CosmosService:
         """Save evaluation result"""
         try:
             result["type"] = "evaluation-result"
-            return self.container.create_item(body=result)
+            saved = self.container.create_item(body=result)
         except CosmosHttpResponseError as e:
             print(f"Error saving evaluation result: {e}")
             raise
+        
+        # The run is already stored; aggregates are best-effort and can be
+        # recovered with rebuild_dashboard_aggregates
+        try:
+            await self._update_dashboard_aggregates(saved)
+        except Exception as e:
+            print(f"Error updating dashboard aggregates: {e}")
+        return saved
+    
+    async def create_evaluation_result(self, name: str, config: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build and save an evaluation result document for a completed run"""
+        return await self.save_evaluation_result({
+            "id": str(uuid.uuid4()),
+            "type": "evaluation-result",
+            "name": name,
+            "config": config,
+            "result": result,
+            "created_at": datetime.utcnow().isoformat(),
+        })
     
     async def get_evaluation_results(self) -> List[Dict[str, Any]]:
         """Get all evaluation results"""
@@ -121,3 +149,284 @@ class CosmosService:
         except CosmosHttpResponseError as e:
             print(f"Error getting evaluation result: {e}")
             return None
+    
+    async def get_latest_evaluation_result(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the most recent evaluation result with the given name"""
+        try:
+            query = (
+                "SELECT TOP 1 * FROM c WHERE c.type = 'evaluation-result' AND c.name = @name "
+                "ORDER BY c.created_at DESC"
+            )
+            items = list(self.container.query_items(
+                query=query,
+                parameters=[{"name": "@name", "value": name}],
+                partition_key="evaluation-result"
+            ))
+            return items[0] if items else None
+        except CosmosHttpResponseError as e:
+            print(f"Error getting latest evaluation result: {e}")
+            return None
+    
+    def _query_context_chunks(self, select: str, chunk_hashes: List[str]) -> List[Any]:
+        """Query context chunks in fixed-size batches to stay under the query size limit"""
+        query = f"SELECT {select} FROM c WHERE c.type = 'context-chunk' AND ARRAY_CONTAINS(@hashes, c.id)"
+        items = []
+        for start in range(0, len(chunk_hashes), CONTEXT_QUERY_BATCH_SIZE):
+            items.extend(self.container.query_items(
+                query=query,
+                parameters=[{"name": "@hashes", "value": chunk_hashes[start:start + CONTEXT_QUERY_BATCH_SIZE]}],
+                partition_key="context-chunk"
+            ))
+        return items
+    
+    async def get_context_chunks(self, chunk_hashes: List[str]) -> List[Dict[str, Any]]:
+        """Get context chunks by their content hashes"""
+        try:
+            return self._query_context_chunks("*", chunk_hashes)
+        except CosmosHttpResponseError as e:
+            print(f"Error getting context chunks: {e}")
+            raise
+    
+    async def get_existing_context_hashes(self, chunk_hashes: List[str]) -> List[str]:
+        """Get the subset of content hashes that are already stored"""
+        # On failure every chunk is treated as new; the upsert that follows is idempotent
+        try:
+            return self._query_context_chunks("VALUE c.id", chunk_hashes)
+        except CosmosHttpResponseError as e:
+            print(f"Error checking context chunks: {e}")
+            return []
+    
+    async def save_context_chunk(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """Save a context chunk (idempotent, keyed by content hash)"""
+        try:
+            chunk["type"] = "context-chunk"
+            return self.container.upsert_item(body=chunk)
+        except CosmosHttpResponseError as e:
+            print(f"Error saving context chunk: {e}")
+            raise
+    
+    def _summarize_evaluation(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce an evaluation result to the fields tracked by the dashboard aggregates"""
+        config = result.get("config") or {}
+        evaluation = result.get("result") or {}
+        overall_metrics = evaluation.get("overall_metrics") or {}
+        return {
+            "id": result.get("id"),
+            "name": result.get("name"),
+            "created_at": result.get("created_at"),
+            "model": (config.get("model") or {}).get("deployment_name", "unknown"),
+            "index": (config.get("search_index") or {}).get("index_name", "unknown"),
+            "total_test_cases": evaluation.get("total_test_cases", 0),
+            "overall_metrics": {
+                metric: self._finite_metric(overall_metrics.get(metric)) for metric in DASHBOARD_METRICS
+            }
+        }
+    
+    @staticmethod
+    def _finite_metric(value: Any) -> Optional[float]:
+        """Ragas reports metrics it could not compute as NaN; those are left out of averages"""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return value if math.isfinite(value) else None
+    
+    @staticmethod
+    def _add_metrics(target: Dict[str, Any], count: int, metrics: Dict[str, Optional[float]]) -> Dict[str, float]:
+        """Add metric values to running sums and counts and return the updated averages"""
+        # Documents written before metric_counts existed counted every run
+        counts = target.setdefault("metric_counts", {metric: count for metric in DASHBOARD_METRICS})
+        for metric in DASHBOARD_METRICS:
+            if metrics[metric] is not None:
+                target["metric_sums"][metric] += metrics[metric]
+                counts[metric] += 1
+        return {
+            metric: target["metric_sums"][metric] / counts[metric] if counts[metric] else 0.0
+            for metric in DASHBOARD_METRICS
+        }
+    
+    def _empty_dashboard_aggregates(self) -> Dict[str, Any]:
+        return {
+            "id": DASHBOARD_AGGREGATES_ID,
+            "type": "dashboard-aggregate",
+            "total_evaluations": 0,
+            "total_test_cases": 0,
+            "last_evaluation_at": None,
+            "metric_sums": {metric: 0.0 for metric in DASHBOARD_METRICS},
+            "metric_counts": {metric: 0 for metric in DASHBOARD_METRICS},
+            "average_metrics": {metric: 0.0 for metric in DASHBOARD_METRICS},
+            "rolling_window": self.dashboard_window,
+            "rolling_average_metrics": {metric: 0.0 for metric in DASHBOARD_METRICS},
+            "recent_evaluations": [],
+            "by_model": {},
+            "by_index": {}
+        }
+    
+    def _apply_to_group(self, group: Optional[Dict[str, Any]], summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold one evaluation summary into a per-model or per-index group"""
+        group = group or {
+            "count": 0,
+            "metric_sums": {metric: 0.0 for metric in DASHBOARD_METRICS},
+            "metric_counts": {metric: 0 for metric in DASHBOARD_METRICS},
+            "trend": []
+        }
+        group["average_metrics"] = self._add_metrics(group, group["count"], summary["overall_metrics"])
+        group["count"] += 1
+        group["last_evaluation_at"] = summary["created_at"]
+        group["trend"] = (group["trend"] + [{
+            "id": summary["id"],
+            "created_at": summary["created_at"],
+            "overall_metrics": summary["overall_metrics"]
+        }])[-self.dashboard_window:]
+        return group
+    
+    def _apply_to_aggregates(self, aggregates: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold one evaluation summary into the dashboard aggregates"""
+        aggregates["average_metrics"] = self._add_metrics(
+            aggregates, aggregates["total_evaluations"], summary["overall_metrics"]
+        )
+        aggregates["total_evaluations"] += 1
+        aggregates["total_test_cases"] += summary["total_test_cases"]
+        if not aggregates["last_evaluation_at"] or summary["created_at"] > aggregates["last_evaluation_at"]:
+            aggregates["last_evaluation_at"] = summary["created_at"]
+        
+        # Most recent first, bounded by the rolling window
+        recent = [summary] + aggregates["recent_evaluations"]
+        recent.sort(key=lambda item: item["created_at"] or "", reverse=True)
+        aggregates["recent_evaluations"] = recent[:self.dashboard_window]
+        aggregates["rolling_window"] = self.dashboard_window
+        aggregates["rolling_average_metrics"] = {}
+        for metric in DASHBOARD_METRICS:
+            values = [
+                item["overall_metrics"][metric] for item in aggregates["recent_evaluations"]
+                if self._finite_metric(item["overall_metrics"].get(metric)) is not None
+            ]
+            aggregates["rolling_average_metrics"][metric] = sum(values) / len(values) if values else 0.0
+        
+        aggregates["by_model"][summary["model"]] = self._apply_to_group(
+            aggregates["by_model"].get(summary["model"]), summary
+        )
+        aggregates["by_index"][summary["index"]] = self._apply_to_group(
+            aggregates["by_index"].get(summary["index"]), summary
+        )
+        return aggregates
+    
+    def _read_dashboard_aggregates(self) -> Optional[Dict[str, Any]]:
+        """Read the aggregates document, or None if it does not exist yet"""
+        try:
+            return self.container.read_item(
+                item=DASHBOARD_AGGREGATES_ID,
+                partition_key="dashboard-aggregate"
+            )
+        except CosmosHttpResponseError as e:
+            if e.status_code == 404:
+                return None
+            raise
+    
+    def _create_dashboard_aggregates(self, aggregates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create the aggregates document, or return None if another writer created it first"""
+        try:
+            return self.container.create_item(body=aggregates)
+        except CosmosHttpResponseError as e:
+            if e.status_code == 409:
+                return None
+            raise
+    
+    def _build_dashboard_aggregates(self) -> Dict[str, Any]:
+        """Compute the dashboard aggregates from all stored evaluation results"""
+        query = (
+            "SELECT c.id, c.name, c.created_at, c.config.model, c.config.search_index, "
+            "c.result.overall_metrics, c.result.total_test_cases "
+            "FROM c WHERE c.type = 'evaluation-result' ORDER BY c.created_at ASC"
+        )
+        items = list(self.container.query_items(
+            query=query,
+            partition_key="evaluation-result"
+        ))
+        
+        aggregates = self._empty_dashboard_aggregates()
+        for item in items:
+            self._apply_to_aggregates(aggregates, self._summarize_evaluation({
+                "id": item.get("id"),
+                "name": item.get("name"),
+                "created_at": item.get("created_at"),
+                "config": {"model": item.get("model"), "search_index": item.get("search_index")},
+                "result": {
+                    "overall_metrics": item.get("overall_metrics"),
+                    "total_test_cases": item.get("total_test_cases", 0)
+                }
+            }))
+        return aggregates
+    
+    async def _update_dashboard_aggregates(self, result: Dict[str, Any], max_attempts: int = 5):
+        """Incrementally fold a newly saved evaluation into the dashboard aggregates"""
+        summary = self._summarize_evaluation(result)
+        for _ in range(max_attempts):
+            aggregates = self._read_dashboard_aggregates()
+            if aggregates is None:
+                # The rebuild already includes the evaluation that was just saved.
+                # If another writer created the document first, fold into theirs.
+                if self._create_dashboard_aggregates(self._build_dashboard_aggregates()):
+                    return
+                continue
+            
+            # A concurrent rebuild may already have counted this evaluation
+            if any(item["id"] == summary["id"] for item in aggregates["recent_evaluations"]):
+                return
+            
+            self._apply_to_aggregates(aggregates, summary)
+            try:
+                self.container.replace_item(
+                    item=DASHBOARD_AGGREGATES_ID,
+                    body=aggregates,
+                    etag=aggregates["_etag"],
+                    match_condition=MatchConditions.IfNotModified
+                )
+                return
+            except CosmosHttpResponseError as e:
+                # 412: another writer updated the aggregates first, retry on the fresh copy
+                if e.status_code != 412:
+                    raise
+        raise RuntimeError("too many concurrent dashboard aggregate updates")
+    
+    async def rebuild_dashboard_aggregates(self, max_attempts: int = 5) -> Dict[str, Any]:
+        """Recompute the dashboard aggregates from all stored evaluation results"""
+        try:
+            for _ in range(max_attempts):
+                current = self._read_dashboard_aggregates()
+                aggregates = self._build_dashboard_aggregates()
+                if current is None:
+                    created = self._create_dashboard_aggregates(aggregates)
+                    if created:
+                        return created
+                    continue
+                
+                try:
+                    return self.container.replace_item(
+                        item=DASHBOARD_AGGREGATES_ID,
+                        body=aggregates,
+                        etag=current["_etag"],
+                        match_condition=MatchConditions.IfNotModified
+                    )
+                except CosmosHttpResponseError as e:
+                    # 412: an evaluation was saved while rebuilding, rebuild again
+                    if e.status_code != 412:
+                        raise
+        except CosmosHttpResponseError as e:
+            print(f"Error rebuilding dashboard aggregates: {e}")
+            raise
+        raise RuntimeError("too many concurrent dashboard aggregate updates")
+    
+    async def get_dashboard_aggregates(self) -> Dict[str, Any]:
+        """Get the precomputed dashboard aggregates, building them on first use"""
+        try:
+            aggregates = self._read_dashboard_aggregates()
+            if aggregates is None:
+                aggregates = (
+                    self._create_dashboard_aggregates(self._build_dashboard_aggregates())
+                    or self._read_dashboard_aggregates()
+                )
+            return aggregates or self._empty_dashboard_aggregates()
+        except CosmosHttpResponseError as e:
+            print(f"Error getting dashboard aggregates: {e}")
+            return self._empty_dashboard_aggregates()
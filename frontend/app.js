@@ -3,6 +3,7 @@ let testData = [];
 let llmConfigs = [];
 let searchConfigs = [];
 let evaluations = [];
+let dashboardSummary = null;
 
 // API base URL - Python backend should be running on port 8000
 const API_BASE = 'http://localhost:8000';
@@ -43,7 +44,7 @@ function showPage(pageId) {
 // Check backend connectivity
 async function checkBackendConnectivity() {
     try {
-        const response = await fetch(`${API_BASE}/evaluations`);
+        const response = await fetch(`${API_BASE}/dashboard-summary`);
         return response.ok;
     } catch (error) {
         return false;
@@ -78,8 +79,8 @@ document.addEventListener('DOMContentLoaded', function() {
 // Dashboard functions
 async function loadDashboard() {
     try {
-        const response = await fetch(`${API_BASE}/evaluations`);
-        evaluations = await response.json();
+        const response = await fetch(`${API_BASE}/dashboard-summary`);
+        dashboardSummary = await response.json();
         
         updateDashboardStats();
         updateRecentEvaluations();
@@ -89,23 +90,17 @@ async function loadDashboard() {
 }
 
 function updateDashboardStats() {
-    const totalEvaluations = evaluations.length;
+    const totalEvaluations = dashboardSummary?.total_evaluations || 0;
+    const averages = dashboardSummary?.average_metrics || {};
     
     let avgFaithfulness = 0;
     let avgRelevancy = 0;
     let lastEvaluation = 'Never';
     
     if (totalEvaluations > 0) {
-        const faithfulnessSum = evaluations.reduce((sum, eval) => 
-            sum + (eval.result?.overall_metrics?.faithfulness || 0), 0);
-        const relevancySum = evaluations.reduce((sum, eval) => 
-            sum + (eval.result?.overall_metrics?.answer_relevancy || 0), 0);
-        
-        avgFaithfulness = (faithfulnessSum / totalEvaluations).toFixed(2);
-        avgRelevancy = (relevancySum / totalEvaluations).toFixed(2);
-        
-        const latest = evaluations[0];
-        lastEvaluation = new Date(latest.created_at).toLocaleDateString();
+        avgFaithfulness = (averages.faithfulness || 0).toFixed(2);
+        avgRelevancy = (averages.answer_relevancy || 0).toFixed(2);
+        lastEvaluation = new Date(dashboardSummary.last_evaluation_at).toLocaleDateString();
     }
     
     document.getElementById('total-evaluations').textContent = totalEvaluations;
@@ -116,8 +111,9 @@ function updateDashboardStats() {
 
 function updateRecentEvaluations() {
     const tbody = document.getElementById('recent-evaluations');
+    const recentEvaluations = dashboardSummary?.recent_evaluations || [];
     
-    if (evaluations.length === 0) {
+    if (recentEvaluations.length === 0) {
         tbody.innerHTML = `
             <tr>
                 <td colspan="7" class="text-center text-muted">No evaluations found</td>
@@ -126,8 +122,8 @@ function updateRecentEvaluations() {
         return;
     }
     
-    tbody.innerHTML = evaluations.slice(0, 10).map(eval => {
-        const metrics = eval.result?.overall_metrics || {};
+    tbody.innerHTML = recentEvaluations.slice(0, 10).map(eval => {
+        const metrics = eval.overall_metrics || {};
         const date = new Date(eval.created_at).toLocaleDateString();
         
         return `
@@ -432,6 +428,13 @@ async function loadComparePage() {
     eval1Select.innerHTML = '<option value="">Select First Evaluation</option>';
     eval2Select.innerHTML = '<option value="">Select Second Evaluation</option>';
     
+    try {
+        const response = await fetch(`${API_BASE}/evaluations`);
+        evaluations = await response.json();
+    } catch (error) {
+        console.error('Error loading evaluations:', error);
+    }
+    
     evaluations.forEach(eval => {
         const option = `<option value="${eval.id}">${eval.name} (${new Date(eval.created_at).toLocaleDateString()})</option>`;
         eval1Select.innerHTML += option;
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+AI Test App - RAGAS
+Headless batch runner for CI regression gates
+
+Runs one or more test data files against saved LLM/search configurations
+without the web server, prints a JSON report and exits non-zero when a
+metric falls below its threshold or regresses against a baseline evaluation.
+
+Exit codes:
+    0 - all datasets evaluated and all gates passed
+    1 - at least one quality gate failed
+    2 - configuration error or evaluation failure
+"""
+
+import sys
+import os
+import json
+import math
+import asyncio
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Add backend to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+METRICS = ["faithfulness", "answer_relevancy", "context_recall", "context_precision"]
+DEFAULT_RAG_PROMPT = "Use the context below to answer.\n{context}\n\nQuestion: {question}"
+
+class GateError(Exception):
+    """Raised for invalid runner configuration"""
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run RAGAS evaluations headlessly and gate on metric thresholds"
+    )
+    parser.add_argument("datasets", nargs="+", help="Test data JSON files (same format as the upload page)")
+    parser.add_argument("--llm-config", required=True, help="ID or name of a saved LLM configuration")
+    parser.add_argument("--search-config", required=True, help="ID or name of a saved search configuration")
+    parser.add_argument("--index", required=True, help="Search index name")
+    parser.add_argument("--name", help="Evaluation name prefix (defaults to the dataset file name)")
+    parser.add_argument("--top-k", type=int, default=5, help="Number of contexts to retrieve (default: 5)")
+    parser.add_argument("--temperature", type=float, help="Override the LLM configuration temperature")
+    parser.add_argument("--assistant-prompt", default="", help="Assistant prompt")
+    parser.add_argument("--rag-prompt", default=DEFAULT_RAG_PROMPT, help="RAG prompt with {context} and {question}")
+    parser.add_argument("--concurrency", type=int, default=4, help="Datasets evaluated in parallel (default: 4)")
+    parser.add_argument("--min-score", type=float, help="Minimum score applied to every metric")
+    parser.add_argument(
+        "--threshold", action="append", default=[], metavar="METRIC=VALUE",
+        help="Minimum score for a single metric, e.g. faithfulness=0.8 (repeatable)"
+    )
+    parser.add_argument(
+        "--baseline", action="append", default=[], metavar="[DATASET=]EVALUATION_ID",
+        help="Evaluation ID to compare a dataset against; DATASET is the file path or name "
+             "and may be omitted when a single dataset is given (repeatable)"
+    )
+    parser.add_argument(
+        "--baseline-latest", action="store_true",
+        help="Compare each dataset against the latest saved evaluation with the same name"
+    )
+    parser.add_argument(
+        "--max-regression", type=float, default=0.0,
+        help="Allowed drop per metric versus the baseline (default: 0.0)"
+    )
+    parser.add_argument("--save", action="store_true", help="Store evaluation results in Cosmos DB")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def parse_thresholds(args: argparse.Namespace) -> Dict[str, float]:
+    """Build per-metric minimum scores from --min-score and --threshold"""
+    thresholds = {}
+    if args.min_score is not None:
+        thresholds = {metric: args.min_score for metric in METRICS}
+
+    for item in args.threshold:
+        metric, sep, value = item.partition("=")
+        if not sep or metric not in METRICS:
+            raise GateError(f"Invalid threshold '{item}', expected one of {', '.join(METRICS)}=VALUE")
+        try:
+            thresholds[metric] = float(value)
+        except ValueError:
+            raise GateError(f"Invalid threshold value in '{item}'")
+
+    return thresholds
+
+def dataset_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+def parse_baselines(args: argparse.Namespace) -> Dict[str, str]:
+    """Map each dataset path to the evaluation ID it is compared against"""
+    if args.baseline and args.baseline_latest:
+        raise GateError("--baseline and --baseline-latest cannot be combined")
+
+    baselines = {}
+    for item in args.baseline:
+        dataset, sep, evaluation_id = item.rpartition("=")
+        if not sep:
+            if len(args.datasets) != 1:
+                raise GateError(
+                    f"Baseline '{item}' must name its dataset (DATASET=EVALUATION_ID) "
+                    "when several datasets are given"
+                )
+            dataset = args.datasets[0]
+
+        matches = [path for path in args.datasets if path == dataset]
+        if not matches:
+            matches = [path for path in args.datasets if dataset_name(path) == dataset]
+        if len(matches) != 1:
+            raise GateError(f"Baseline '{item}' does not match exactly one dataset")
+        if not evaluation_id:
+            raise GateError(f"Baseline '{item}' is missing an evaluation ID")
+        baselines[matches[0]] = evaluation_id
+
+    return baselines
+
+def baseline_metrics_for(evaluation: Dict[str, Any]) -> Dict[str, float]:
+    """Get the overall metrics of a baseline evaluation, requiring every gated metric"""
+    overall_metrics = (evaluation.get("result") or {}).get("overall_metrics") or {}
+    missing = [metric for metric in METRICS if metric not in overall_metrics]
+    if missing:
+        raise GateError(
+            f"Baseline evaluation '{evaluation.get('id')}' has no {', '.join(missing)} metrics"
+        )
+    return {metric: overall_metrics[metric] for metric in METRICS}
+
+def load_test_cases(path: str) -> List[Dict[str, Any]]:
+    """Load and validate a test data file"""
+    try:
+        with open(path, "r") as f:
+            test_data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise GateError(f"Could not read test data '{path}': {e}")
+
+    if not isinstance(test_data, list):
+        raise GateError(f"'{path}' must be an array of test cases")
+
+    required_fields = ['id', 'question', 'ground_truth']
+    for item in test_data:
+        if not all(field in item for field in required_fields):
+            raise GateError(f"Each test case in '{path}' must have: {', '.join(required_fields)}")
+
+    return test_data
+
+async def find_config(cosmos_service, config_type: str, id_or_name: str) -> Dict[str, Any]:
+    """Find a saved configuration by ID, falling back to its name"""
+    configs = await cosmos_service.get_configs(config_type)
+    for key in ("id", "name"):
+        for config in configs:
+            if config.get(key) == id_or_name:
+                return config
+    raise GateError(f"No {config_type} found with ID or name '{id_or_name}'")
+
+def build_request(args: argparse.Namespace, path: str, test_cases: List[Dict[str, Any]],
+                  llm_config: Dict[str, Any], search_config: Dict[str, Any]):
+    from models.schemas import EvaluationRequest
+
+    name = dataset_name(path)
+    return EvaluationRequest(
+        name=f"{args.name} - {name}" if args.name else name,
+        model={
+            "provider": llm_config["provider"],
+            "chat_endpoint": llm_config["chat_endpoint"],
+            "deployment_name": llm_config["deployment_name"],
+            "api_version": llm_config["api_version"],
+            "subscription_key": llm_config["subscription_key"],
+            "temperature": args.temperature if args.temperature is not None else llm_config.get("temperature", 0.5),
+            "top_k": args.top_k,
+            "max_tokens": llm_config.get("max_tokens", 1024)
+        },
+        search_index={
+            "search_service_endpoint": search_config["search_service_endpoint"],
+            "index_name": args.index
+        },
+        prompts={
+            "assistant_prompt": args.assistant_prompt,
+            "rag_prompt": args.rag_prompt
+        },
+        test_cases=test_cases
+    )
+
+def is_valid_score(value: Any) -> bool:
+    """Ragas reports metrics it could not compute as NaN"""
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+def check_gates(metrics: Dict[str, float], thresholds: Dict[str, float],
+                baseline_metrics: Optional[Dict[str, float]], max_regression: float) -> List[str]:
+    """Return a list of human-readable gate failures for one evaluation"""
+    failures = []
+    for metric, minimum in thresholds.items():
+        value = metrics.get(metric)
+        if not is_valid_score(value):
+            failures.append(f"{metric} could not be computed (value: {value})")
+        elif value < minimum:
+            failures.append(f"{metric} {value:.3f} is below threshold {minimum:.3f}")
+
+    if baseline_metrics is not None:
+        for metric in METRICS:
+            value = metrics.get(metric)
+            baseline_value = baseline_metrics[metric]
+            if not is_valid_score(baseline_value):
+                failures.append(f"{metric} baseline value is not a valid score (value: {baseline_value})")
+            elif not is_valid_score(value):
+                failures.append(f"{metric} could not be computed (value: {value})")
+            elif value < baseline_value - max_regression:
+                failures.append(
+                    f"{metric} {value:.3f} regressed from baseline {baseline_value:.3f}"
+                )
+
+    # A missing metric can fail both the threshold and the baseline check
+    return list(dict.fromkeys(failures))
+
+def sanitize_report(value: Any) -> Any:
+    """Replace non-finite floats with None so the report is strict JSON"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: sanitize_report(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize_report(item) for item in value]
+    return value
+
+def evaluate_dataset(ragas_service, request) -> Dict[str, Any]:
+    """Run one evaluation on its own event loop so datasets can run in parallel threads"""
+    return asyncio.run(ragas_service.run_evaluation(request))
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    thresholds = parse_thresholds(args)
+    baseline_ids = parse_baselines(args)
+    datasets = {path: load_test_cases(path) for path in args.datasets}
+
+    from services.cosmos_service import CosmosService
+    from services.ragas_service import RagasService
+    from services.context_store_service import ContextStoreService
+
+    cosmos_service = CosmosService()
+    llm_config = await find_config(cosmos_service, "llm-config", args.llm_config)
+    search_config = await find_config(cosmos_service, "search-service", args.search_config)
+
+    requests = {
+        path: build_request(args, path, test_cases, llm_config, search_config)
+        for path, test_cases in datasets.items()
+    }
+
+    # Resolve baselines before this run is saved so it never compares against itself
+    baselines = {}
+    for path, request in requests.items():
+        if args.baseline_latest:
+            baseline = await cosmos_service.get_latest_evaluation_result(request.name)
+            if not baseline:
+                print(f"Warning: no saved evaluation named '{request.name}' to use as baseline")
+                continue
+        elif path in baseline_ids:
+            baseline = await cosmos_service.get_evaluation_result(baseline_ids[path])
+            if not baseline:
+                raise GateError(f"Baseline evaluation '{baseline_ids[path]}' not found")
+        else:
+            continue
+        baselines[path] = {"evaluation_id": baseline["id"], "overall_metrics": baseline_metrics_for(baseline)}
+
+    ragas_service = RagasService()
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        futures = [
+            loop.run_in_executor(executor, evaluate_dataset, ragas_service, request)
+            for request in requests.values()
+        ]
+        outcomes = await asyncio.gather(*futures, return_exceptions=True)
+
+    context_store = ContextStoreService(cosmos_service) if args.save else None
+    reports = []
+    for (path, request), outcome in zip(requests.items(), outcomes):
+        report = {
+            "dataset": path,
+            "name": request.name,
+            "total_test_cases": len(request.test_cases),
+            "baseline": baselines.get(path)
+        }
+
+        if isinstance(outcome, Exception):
+            report.update({"status": "error", "error": str(outcome)})
+            reports.append(report)
+            continue
+
+        metrics = outcome["overall_metrics"]
+        baseline_metrics = baselines[path]["overall_metrics"] if path in baselines else None
+        failures = check_gates(metrics, thresholds, baseline_metrics, args.max_regression)
+        report.update({
+            "status": "failed" if failures else "passed",
+            "overall_metrics": metrics,
+            "failures": failures
+        })
+
+        if context_store:
+            try:
+                evaluation_result = await cosmos_service.create_evaluation_result(
+                    request.name,
+                    request.dict(),
+                    await context_store.dehydrate_result(outcome)
+                )
+                report["evaluation_id"] = evaluation_result["id"]
+            except Exception as e:
+                report["save_error"] = str(e)
+
+        reports.append(report)
+
+    statuses = {report["status"] for report in reports}
+    if any("save_error" in report for report in reports):
+        statuses.add("error")
+    return {
+        "status": "error" if "error" in statuses else "failed" if "failed" in statuses else "passed",
+        "thresholds": thresholds,
+        "max_regression": args.max_regression,
+        "datasets": reports,
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    # Services log to stdout; keep stdout clean for the machine-readable report
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(run(args))
+    except GateError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    except ImportError as e:
+        print(f"Error: {e}. Please run: pip install -r requirements.txt", file=sys.stderr)
+        return 2
+    except Exception as e:
+        print(f"Error running batch evaluation: {e}", file=sys.stderr)
+        return 2
+
+    output = json.dumps(sanitize_report(report), indent=2, allow_nan=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    return {"passed": 0, "failed": 1}.get(report["status"], 2)
+
+if __name__ == "__main__":
+    sys.exit(main())